@@ -2,18 +2,23 @@
 
 from __future__ import annotations
 
+import io
 import json
 import logging
 import re
 import warnings
 from dataclasses import dataclass
-from decimal import Decimal, InvalidOperation
-from enum import Enum, IntEnum, auto
+from enum import Enum, IntEnum, auto, unique
 from functools import lru_cache
 from typing import TYPE_CHECKING, Any
 
 from wcwidth import wcswidth
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 if TYPE_CHECKING:
     from pathlib import PosixPath
 
@@ -26,6 +31,41 @@ def _wcswidth(s: str) -> int:
     return wcswidth(s)
 
 
+# Scalar types that orjson serializes exactly as json.dumps does. Floats are excluded
+# as orjson writes them differently.
+_FAST_DUMPS_TYPES = (str, int, bool, type(None))
+
+# Only short strings such as keys and enum-like values are worth memoizing; caching
+# longer ones would keep large user values alive after serialize() returns
+_MAX_CACHED_STRING_LENGTH = 64
+
+
+@lru_cache(4096)
+def _dumps_cached(value: str, ensure_ascii: bool) -> str:
+    return _fast_dumps(value, ensure_ascii)
+
+
+def _dumps_str(value: str, ensure_ascii: bool) -> str:
+    if len(value) <= _MAX_CACHED_STRING_LENGTH:
+        return _dumps_cached(value, ensure_ascii)
+    return _fast_dumps(value, ensure_ascii)
+
+
+def _fast_dumps(value: str | int | bool | None, ensure_ascii: bool) -> str:
+    # orjson never escapes non-ASCII characters and json.dumps escapes DEL when
+    # ensure_ascii is set, so only strings that encode identically are sent to orjson.
+    # orjson raises TypeError for lone surrogates and integers beyond 64 bits.
+    if orjson is not None and (
+        not ensure_ascii or not isinstance(value, str) or (value.isascii() and "\x7f" not in value)
+    ):
+        try:
+            return orjson.dumps(value).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(value, ensure_ascii=ensure_ascii)
+
+
+@unique
 class EolStyle(IntEnum):
     """End of line style enumeration."""
 
@@ -33,6 +73,7 @@ class EolStyle(IntEnum):
     LF = auto()
 
 
+@unique
 class JsonValueKind(IntEnum):
     """JSON token enumeration."""
 
@@ -46,6 +87,7 @@ class JsonValueKind(IntEnum):
     NULL = auto()
 
 
+@unique
 class Format(IntEnum):
     """Format type enumeration."""
 
@@ -55,6 +97,21 @@ class Format(IntEnum):
     EXPANDED = auto()
 
 
+# Looking up enum members goes through the enum metaclass, so the hottest format
+# checks compare by identity against these module-level aliases instead
+_INLINE = Format.INLINE
+_INLINE_FORMATS = (Format.INLINE, Format.INLINE_TABULAR)
+
+# Kinds of scalar values looked up by exact type; subclasses use isinstance() checks
+_SIMPLE_KINDS = {
+    type(None): JsonValueKind.NULL,
+    bool: JsonValueKind.BOOLEAN,
+    int: JsonValueKind.INT,
+    float: JsonValueKind.FLOAT,
+    str: JsonValueKind.STRING,
+}
+
+
 class FormattedNode:
     """Data about a JSON element and how we've formatted it."""
 
@@ -69,24 +126,24 @@ class FormattedNode:
         self.kind = JsonValueKind.UNDEFINED
         self.format = Format.INLINE
         self.children: list[FormattedNode] = []
+        # Multi-line nodes keep their output as strings and child nodes, which are
+        # written out once by Formatter.serialize() rather than joined at every level
+        self.fragments: list[str | FormattedNode] | None = None
 
     def cleanup(self: FormattedNode) -> None:
         """Cleanup children."""
-        if self.format != Format.INLINE:
+        if self.format is not _INLINE:
             self.children = []
-        for child in self.children:
-            child.children = []
 
 
 def _fixed_value(value: str, num_decimals: int) -> str:
-    if "e" in value:
+    if "e" in value or value in ("NaN", "Infinity", "-Infinity"):
         return value
 
-    quantize_str = "0." + "0" * (num_decimals - 1) + "1" if num_decimals > 0 else "0"
-
-    try:
-        return str(Decimal(value).quantize(Decimal(quantize_str)))
-    except InvalidOperation:  # pragma: no cover
+    # Column stats guarantee no value has more than num_decimals digits after the
+    # point, so padding the fraction with zeros is all that is needed.
+    (whole, _, frac) = value.partition(".")
+    if not whole.lstrip("-").isdigit() or (frac and not frac.isdigit()):  # pragma: no cover
         warnings.warn(
             "handled quantize error (please report an issue)",
             RuntimeWarning,
@@ -94,6 +151,10 @@ def _fixed_value(value: str, num_decimals: int) -> str:
         )
         return value
 
+    if num_decimals == 0:
+        return whole
+    return whole + "." + frac.ljust(num_decimals, "0")
+
 
 class ColumnStats:
     """Used in figuring out how to format properties/list items as columns in a table format."""
@@ -110,39 +171,41 @@ class ColumnStats:
         self.kind = JsonValueKind.NULL
         self.chars_before_dec = 0
         self.chars_after_dec = 0
+        # Derived from chars_before_dec/chars_after_dec on first use by format_value
+        self._total_length = None
 
     def update(self: ColumnStats, prop_node: FormattedNode, index: int) -> None:
         """Add stats about this FormattedNode to this PropertyStats."""
+        self._total_length = None
         self.order_sum += index
         self.count += 1
         debug("update()")
         debug(f"  value={prop_node.value}¶")
         debug(f"  max_value_size={self.max_value_size}")
         debug(f"  value_length={prop_node.value_length}")
-        self.max_value_size = max([self.max_value_size, prop_node.value_length])
-        if self.kind == JsonValueKind.NULL:
-            self.kind = prop_node.kind
-        elif (
-            self.kind == JsonValueKind.FLOAT
-            and prop_node.kind == JsonValueKind.INT
-            or self.kind == JsonValueKind.INT
-            and prop_node.kind == JsonValueKind.FLOAT
+        self.max_value_size = max(self.max_value_size, prop_node.value_length)
+        kind = prop_node.kind
+        if self.count == 1:
+            self.kind = kind
+        elif (self.kind == JsonValueKind.FLOAT and kind == JsonValueKind.INT) or (
+            self.kind == JsonValueKind.INT and kind == JsonValueKind.FLOAT
         ):
             self.kind = JsonValueKind.FLOAT
-        elif self.kind != prop_node.kind:
+        elif self.kind != kind:
             self.kind = JsonValueKind.UNDEFINED
 
-        if prop_node.kind == JsonValueKind.FLOAT:
-            if "." in prop_node.value:
-                (whole, frac) = prop_node.value.split(".")
+        if kind == JsonValueKind.FLOAT:
+            value = prop_node.value
+            dec_index = value.find(".")
+            if dec_index < 0:
+                self.chars_before_dec = max(self.chars_before_dec, len(value))
             else:
-                (whole, frac) = (prop_node.value, "")
-            self.chars_after_dec = max([self.chars_after_dec, len(frac)])
-            self.chars_before_dec = max([self.chars_before_dec, len(whole)])
+                self.chars_before_dec = max(self.chars_before_dec, dec_index)
+                self.chars_after_dec = max(self.chars_after_dec, len(value) - dec_index - 1)
             debug(f"  chars_after_dec={self.chars_after_dec}")
             debug(f"  chars_before_dec={self.chars_before_dec}")
-        elif prop_node.kind == JsonValueKind.INT:
-            self.chars_before_dec = max([self.chars_before_dec, len(prop_node.value)])
+        elif kind == JsonValueKind.INT:
+            self.chars_before_dec = max(self.chars_before_dec, len(prop_node.value))
             debug(f"  chars_before_dec={self.chars_before_dec}")
 
     @property
@@ -176,9 +239,11 @@ class ColumnStats:
         if (
             self.kind in (JsonValueKind.FLOAT, JsonValueKind.INT)
         ) and not self.dont_justify:
+            if self._total_length is None:
+                self._total_length = self.chars_before_dec + self.chars_after_dec
+                self._total_length += 1 if self.chars_after_dec > 0 else 0
             adjusted_val = _fixed_value(value, self.chars_after_dec)
-            total_length = self.chars_before_dec + self.chars_after_dec
-            total_length += 1 if self.chars_after_dec > 0 else 0
+            total_length = self._total_length
             debug(f"  adjusted_val={adjusted_val}")
             debug(f"  chars_before_dec={self.chars_before_dec}")
             debug(f"  chars_after_dec={self.chars_after_dec}")
@@ -341,7 +406,11 @@ class Formatter:
     def serialize(self: Formatter, value: str) -> str:
         """Serialize a value to formatted JSON."""
         self.init_internals()
-        value = self.prefix_string + self.format_element(0, value).value
+        root = self.format_element(0, value)
+        out = io.StringIO()
+        out.write(self.prefix_string)
+        self._emit(root, out)
+        value = out.getvalue()
         if self.omit_trailing_whitespace:
             value = re.sub(r"\s+$", "", value, flags=re.MULTILINE)
         return value
@@ -352,14 +421,27 @@ class Formatter:
         self.indent_str = "\t" if self.use_tab_to_indent else " " * self.indent_spaces
         self.padded_comma_str = ", " if self.comma_padding else ","
         self.padded_colon_str = ": " if self.colon_padding else ":"
+        # Prefix and indent settings may have changed since the last call
+        self.indent_cache = {}
 
     def indent(self: Formatter, buffer: list[str], depth: int) -> list[str]:
         """Indent a list of strings."""
         if depth not in self.indent_cache:
-            self.indent_cache[depth] = self.indent_str * depth
-        buffer += [self.prefix_string, self.indent_cache[depth]]
+            self.indent_cache[depth] = self.prefix_string + self.indent_str * depth
+        buffer.append(self.indent_cache[depth])
         return buffer
 
+    def _emit(self: Formatter, node: FormattedNode, out: io.StringIO) -> None:
+        """Write the formatted value of a node and its nested multi-line nodes."""
+        if node.fragments is None:
+            out.write(node.value)
+            return
+        for fragment in node.fragments:
+            if isinstance(fragment, str):
+                out.write(fragment)
+            else:
+                self._emit(fragment, out)
+
     def combine(self: Formatter, buffer: list[str]) -> str:
         """Combine a list of strings to a single string."""
         return "".join(buffer)
@@ -379,17 +461,19 @@ class Formatter:
     def format_simple(self: Formatter, depth: int, element: object) -> FormattedNode:
         """Format a JSON element other than an list or dict."""
         simple_node = FormattedNode()
-        simple_node.value = json.dumps(element, ensure_ascii=self.ensure_ascii)
+        if type(element) is str:
+            simple_node.value = _dumps_str(element, self.ensure_ascii)
+        elif type(element) in _FAST_DUMPS_TYPES:
+            simple_node.value = _fast_dumps(element, self.ensure_ascii)
+        else:
+            simple_node.value = json.dumps(element, ensure_ascii=self.ensure_ascii)
         simple_node.value_length = self.str_len(simple_node.value)
         simple_node.complexity = 0
         simple_node.depth = depth
 
-        if element is None:
-            simple_node.kind = JsonValueKind.NULL
-            return simple_node
-
-        if isinstance(element, bool):
-            simple_node.kind = JsonValueKind.BOOLEAN
+        kind = _SIMPLE_KINDS.get(type(element))
+        if kind is not None:
+            simple_node.kind = kind
         elif isinstance(element, int):
             simple_node.kind = JsonValueKind.INT
         elif isinstance(element, float):
@@ -401,13 +485,15 @@ class Formatter:
 
     def format_list(self: Formatter, depth: int, element: list) -> FormattedNode:
         """Recursively format all of this list's elements."""
-        items = [self.format_element(depth + 1, child) for child in element]
+        format_element = self.format_element
+        child_depth = depth + 1
+        items = [format_element(child_depth, child) for child in element]
         if len(items) == 0:
             return self.empty_list(depth)
 
         item = FormattedNode()
         item.kind = JsonValueKind.LIST
-        item.complexity = max([fn.complexity for fn in items]) + 1
+        item.complexity = max(fn.complexity for fn in items) + 1
         item.depth = depth
         item.children = items
 
@@ -428,23 +514,28 @@ class Formatter:
         self.format_list_expanded(item)
         return item
 
-    def format_dict(self: Formatter, depth: int, element: dict) -> FormattedNode:
+    def format_dict(self: Formatter, depth: int, element: dict) -> FormattedNode:  # noqa: C901
         """Recursively format all of this dict's property values."""
+        format_element = self.format_element
+        str_len = self.str_len
+        ensure_ascii = self.ensure_ascii
+        child_depth = depth + 1
         items = []
         keys = {}
         for k, v in element.items():
-            elem = self.format_element(depth + 1, v)
-            if isinstance(k, Enum):
-                k = k.value  # noqa: PLW2901
-            if not isinstance(k, str):
-                warnings.warn(
-                    f"converting key value {k} to string",
-                    RuntimeWarning,
-                    stacklevel=2,
-                )
-            k = str(k)  # noqa: PLW2901
-            elem.name = json.dumps(k, ensure_ascii=self.ensure_ascii)
-            elem.name_length = self.str_len(elem.name)
+            elem = format_element(child_depth, v)
+            if type(k) is not str:
+                if isinstance(k, Enum):
+                    k = k.value  # noqa: PLW2901
+                if not isinstance(k, str):
+                    warnings.warn(
+                        f"converting key value {k} to string",
+                        RuntimeWarning,
+                        stacklevel=2,
+                    )
+                k = str(k)  # noqa: PLW2901
+            elem.name = _dumps_str(k, ensure_ascii)
+            elem.name_length = str_len(elem.name)
             if k in keys:
                 warnings.warn(
                     f"duplicate key value {k}",
@@ -461,7 +552,7 @@ class Formatter:
 
         item = FormattedNode()
         item.kind = JsonValueKind.DICT
-        item.complexity = max([fn.complexity for fn in items]) + 1
+        item.complexity = max(fn.complexity for fn in items) + 1
         item.depth = depth
         item.children = items
 
@@ -500,35 +591,28 @@ class Formatter:
         ):
             return False
 
-        if any(fn.format != Format.INLINE for fn in item.children):
-            return False
-
         if item.complexity >= 2:  # noqa: PLR2004
             use_bracket_padding = self.nested_bracket_padding
         else:
             use_bracket_padding = self.simple_bracket_padding
-        line_length = 2 + (2 if use_bracket_padding else 0)
-        line_length += (len(item.children) - 1) * len(self.padded_comma_str)
-        line_length += sum([fn.value_length for fn in item.children])
-
-        if line_length > self.max_inline_length:
-            return False
-
-        buffer = ["["]
-
-        if use_bracket_padding:
-            buffer += " "
 
-        first_elem = True
+        # Stop as soon as a child can't be inlined or the line becomes too long
+        max_inline_length = self.max_inline_length
+        padded_comma = self.padded_comma_str
+        line_length = 2 + (2 if use_bracket_padding else 0)
+        line_length += (len(item.children) - 1) * len(padded_comma)
         for child in item.children:
-            if not first_elem:
-                buffer += self.padded_comma_str
-            buffer += child.value
-            first_elem = False
+            line_length += child.value_length
+            if child.format is not _INLINE or line_length > max_inline_length:
+                return False
+
+        buffer = ["[ " if use_bracket_padding else "["]
+        for child_index, child in enumerate(item.children):
+            if child_index:
+                buffer.append(padded_comma)
+            buffer.append(child.value)
 
-        if use_bracket_padding:
-            buffer += " "
-        buffer += "]"
+        buffer.append(" ]" if use_bracket_padding else "]")
 
         item.value = self.combine(buffer)
         debug(f"format_list_inline: value_length = {line_length}")
@@ -548,58 +632,51 @@ class Formatter:
         ):
             return False
 
-        buffer = ["[", self.eol_str]
-        self.indent(buffer, item.depth + 1)
+        padded_comma = self.padded_comma_str
+        eol = self.eol_str
+        max_inline_length = self.max_inline_length
+        children = item.children
+        last_index = len(children) - 1
+        child_depth = item.depth + 1
+        inline_formats = _INLINE_FORMATS
 
-        line_length_so_far = 0
-        child_index = 0
-        while child_index < len(item.children):
-            not_last_item = child_index < (len(item.children) - 1)
+        buffer = ["[", eol]
+        self.indent(buffer, child_depth)
 
-            item_length = item.children[child_index].value_length
-            segment_length = item_length + len(self.padded_comma_str)
+        line_length_so_far = 0
+        for child_index, child in enumerate(children):
+            segment_length = child.value_length + len(padded_comma)
             if child_index != 0:
                 flag_new_line = False
-                if item.children[child_index].format not in [
-                    Format.INLINE,
-                    Format.INLINE_TABULAR,
-                ]:
-                    if item.children[child_index - 1].format in [
-                        Format.INLINE,
-                        Format.INLINE_TABULAR,
-                    ]:
+                if child.format not in inline_formats:
+                    if children[child_index - 1].format in inline_formats:
                         flag_new_line = True
-                elif item.children[child_index - 1].format not in [
-                    Format.INLINE,
-                    Format.INLINE_TABULAR,
-                ]:
+                elif children[child_index - 1].format not in inline_formats:
                     flag_new_line = True
                 elif (
-                    line_length_so_far + segment_length
-                    > self.max_inline_length + len(self.padded_comma_str)
+                    line_length_so_far + segment_length > max_inline_length + len(padded_comma)
                     and line_length_so_far > 0
                 ):
-                    debug(f"  max_inline_length={self.max_inline_length}")
+                    debug(f"  max_inline_length={max_inline_length}")
                     debug(f"  line_length_so_far={line_length_so_far}")
                     debug(f"  segment_length={segment_length}")
-                    debug(f"  buffer={buffer}¶")
+                    debug(f"  buffer={[f for f in buffer if isinstance(f, str)]}¶")
                     flag_new_line = True
                 if flag_new_line:
-                    buffer += self.eol_str
-                    self.indent(buffer, item.depth + 1)
+                    buffer.append(eol)
+                    self.indent(buffer, child_depth)
                     line_length_so_far = 0
-            buffer += item.children[child_index].value
-            if not_last_item:
-                buffer += self.padded_comma_str
+            buffer.append(child.value if child.fragments is None else child)
+            if child_index < last_index:
+                buffer.append(padded_comma)
 
-            child_index += 1
             line_length_so_far += segment_length
 
-        buffer += self.eol_str
+        buffer.append(eol)
         self.indent(buffer, item.depth)
-        buffer += "]"
+        buffer.append("]")
 
-        item.value = self.combine(buffer)
+        item.fragments = buffer
         item.format = Format.MULTILINE_COMPACT
         return True
 
@@ -617,7 +694,7 @@ class Formatter:
             return False
 
         value_length = (
-            sum([col.prop_name_length + col.max_value_size for col in col_stats])
+            sum(col.prop_name_length + col.max_value_size for col in col_stats)
             + len(self.padded_colon_str) * len(col_stats)
             + len(self.padded_comma_str) * (len(col_stats) - 1)
             + 4
@@ -645,7 +722,7 @@ class Formatter:
             return False
 
         value_length = (
-            sum([col.max_value_size for col in column_stats])
+            sum(col.max_value_size for col in column_stats)
             + len(self.padded_comma_str) * (len(column_stats) - 1)
             + 4
         )
@@ -692,7 +769,7 @@ class Formatter:
         debug("...format_list_table_row()")
         item.value = self.combine(buffer)
         item.value_length = (
-            sum([col.max_value_size for col in column_stats_list])
+            sum(col.max_value_size for col in column_stats_list)
             + len(self.padded_comma_str) * (len(column_stats_list) - 1)
             + 4
         )
@@ -704,18 +781,22 @@ class Formatter:
 
         They might be multiple lines themselves
         """
-        buffer = ["[", self.eol_str]
-        first_elem = True
-        for child in item.children:
-            if not first_elem:
-                buffer += [self.padded_comma_str, self.eol_str]
-            self.indent(buffer, child.depth).append(child.value)
-            first_elem = False
+        eol = self.eol_str
+        separator = self.padded_comma_str + eol
+        indent = self.indent
+
+        buffer = ["[", eol]
+        for child_index, child in enumerate(item.children):
+            if child_index:
+                buffer.append(separator)
+            indent(buffer, child.depth).append(
+                child.value if child.fragments is None else child,
+            )
 
-        buffer += self.eol_str
-        self.indent(buffer, item.depth).append("]")
+        buffer.append(eol)
+        indent(buffer, item.depth).append("]")
 
-        item.value = self.combine(buffer)
+        item.fragments = buffer
         item.format = Format.EXPANDED
         return True
 
@@ -738,38 +819,31 @@ class Formatter:
         ):
             return False
 
-        if any(fn.format != Format.INLINE for fn in item.children):
-            return False
-
         use_bracket_padding = (
             self.nested_bracket_padding
             if item.complexity >= 2  # noqa: PLR2004
             else self.simple_bracket_padding
         )
 
+        # Stop as soon as a child can't be inlined or the line becomes too long
+        max_inline_length = self.max_inline_length
+        padded_comma = self.padded_comma_str
+        padded_colon = self.padded_colon_str
         line_length = 2 + (2 if use_bracket_padding else 0)
-        line_length += len(item.children) * len(self.padded_colon_str)
-        line_length += (len(item.children) - 1) * len(self.padded_comma_str)
-        line_length += sum([fn.name_length for fn in item.children])
-        line_length += sum([fn.value_length for fn in item.children])
-        if line_length > self.max_inline_length:
-            return False
-
-        buffer = ["{"]
-
-        if use_bracket_padding:
-            buffer += " "
-
-        first_elem = True
+        line_length += len(item.children) * len(padded_colon)
+        line_length += (len(item.children) - 1) * len(padded_comma)
         for prop in item.children:
-            if not first_elem:
-                buffer += self.padded_comma_str
-            buffer += [prop.name, self.padded_colon_str, prop.value]
-            first_elem = False
+            line_length += prop.name_length + prop.value_length
+            if prop.format is not _INLINE or line_length > max_inline_length:
+                return False
 
-        if use_bracket_padding:
-            buffer += " "
-        buffer += "}"
+        buffer = ["{ " if use_bracket_padding else "{"]
+        for child_index, prop in enumerate(item.children):
+            if child_index:
+                buffer.append(padded_comma)
+            buffer += [prop.name, padded_colon, prop.value]
+
+        buffer.append(" }" if use_bracket_padding else "}")
 
         item.value = self.combine(buffer)
         debug(f"format_dict_inline: value_length = {line_length}")
@@ -794,72 +868,59 @@ class Formatter:
         ):
             return False
 
-        max_prop_name_length = max([fn.name_length for fn in item.children])
+        padded_comma = self.padded_comma_str
+        padded_colon = self.padded_colon_str
+        eol = self.eol_str
+        max_inline_length = self.max_inline_length
+        children = item.children
+        last_index = len(children) - 1
+        child_depth = item.depth + 1
+        inline_formats = _INLINE_FORMATS
+        max_prop_name_length = max(fn.name_length for fn in children)
 
-        buffer = ["{", self.eol_str]
-        self.indent(buffer, item.depth + 1)
+        buffer = ["{", eol]
+        self.indent(buffer, child_depth)
 
         line_length_so_far = 0
-        child_index = 0
-        while child_index < len(item.children):
-            not_last_item = child_index < (len(item.children) - 1)
-            prop = item.children[child_index]
-            prop_buffer = [
-                prop.name,
-                self.padded_colon_str,
-                prop.value,
-            ]
+        for child_index, prop in enumerate(children):
+            prop_buffer = [prop.name, padded_colon, prop.value if prop.fragments is None else prop]
             if force_expand_prop_names:
                 prop_buffer.insert(1, " " * (max_prop_name_length - prop.name_length))
                 prop.name_length = max_prop_name_length
             segment_length = (
-                prop.name_length
-                + len(self.padded_colon_str)
-                + prop.value_length
-                + len(self.padded_comma_str)
+                prop.name_length + len(padded_colon) + prop.value_length + len(padded_comma)
             )
             if child_index != 0:
                 flag_new_line = False
-                if prop.format not in [
-                    Format.INLINE,
-                    Format.INLINE_TABULAR,
-                ]:
-                    if item.children[child_index - 1].format in [
-                        Format.INLINE,
-                        Format.INLINE_TABULAR,
-                    ]:
+                if prop.format not in inline_formats:
+                    if children[child_index - 1].format in inline_formats:
                         flag_new_line = True
-                elif item.children[child_index - 1].format not in [
-                    Format.INLINE,
-                    Format.INLINE_TABULAR,
-                ]:
+                elif children[child_index - 1].format not in inline_formats:
                     flag_new_line = True
                 elif (
-                    line_length_so_far + segment_length
-                    > self.max_inline_length + len(self.padded_comma_str)
+                    line_length_so_far + segment_length > max_inline_length + len(padded_comma)
                     and line_length_so_far > 0
                 ):
-                    debug(f"  max_inline_length={self.max_inline_length}")
+                    debug(f"  max_inline_length={max_inline_length}")
                     debug(f"  line_length_so_far={line_length_so_far}")
                     debug(f"  segment_length={segment_length}")
-                    debug(f"  buffer={buffer}¶")
+                    debug(f"  buffer={[f for f in buffer if isinstance(f, str)]}¶")
                     flag_new_line = True
                 if flag_new_line:
-                    buffer += self.eol_str
-                    self.indent(buffer, item.depth + 1)
+                    buffer.append(eol)
+                    self.indent(buffer, child_depth)
                     line_length_so_far = 0
             buffer += prop_buffer
-            if not_last_item:
-                buffer += self.padded_comma_str
+            if child_index < last_index:
+                buffer.append(padded_comma)
 
-            child_index += 1
             line_length_so_far += segment_length
 
-        buffer += self.eol_str
+        buffer.append(eol)
         self.indent(buffer, item.depth)
-        buffer += "}"
+        buffer.append("}")
 
-        item.value = self.combine(buffer)
+        item.fragments = buffer
         item.format = Format.MULTILINE_COMPACT
         return True
 
@@ -877,7 +938,7 @@ class Formatter:
             return False
 
         value_length = (
-            sum([col.prop_name_length + col.max_value_size for col in prop_stats])
+            sum(col.prop_name_length + col.max_value_size for col in prop_stats)
             + len(self.padded_colon_str) * len(prop_stats)
             + len(self.padded_comma_str) * (len(prop_stats) - 1)
             + 4
@@ -908,7 +969,7 @@ class Formatter:
             return False
 
         value_length = (
-            sum([col.max_value_size for col in column_stats])
+            sum(col.max_value_size for col in column_stats)
             + len(self.padded_comma_str) * (len(column_stats) - 1)
             + 4
         )
@@ -932,12 +993,11 @@ class Formatter:
         # Bundle up each property name, value, quotes, colons, etc., or equivalent empty space.
         highest_non_blank_index = -1
         prop_segment_strings = []
+        prop_nodes = {fn.name: fn for fn in item.children}
         for col_index, column_stats in enumerate(column_stats_list):
             buffer = []
-            filtered_prop_nodes = list(
-                filter(lambda fn: fn.name == column_stats.prop_name, item.children),
-            )
-            if len(filtered_prop_nodes) == 0:
+            prop_node = prop_nodes.get(column_stats.prop_name)
+            if prop_node is None:
                 # This dict doesn't have this particular property. Pad it out.
                 skip_length = (
                     column_stats.prop_name_length
@@ -946,7 +1006,6 @@ class Formatter:
                 )
                 buffer += " " * skip_length
             else:
-                prop_node = filtered_prop_nodes[0]
                 buffer += [column_stats.prop_name, self.padded_colon_str]
                 buffer += column_stats.format_value(
                     prop_node.value,
@@ -985,25 +1044,28 @@ class Formatter:
 
         They might be multiple lines.
         """
-        max_prop_name_length = max([fn.name_length for fn in item.children])
+        max_prop_name_length = max(fn.name_length for fn in item.children)
+        align_names = self.align_expanded_property_names or force_expand_prop_names
+        eol = self.eol_str
+        separator = self.padded_comma_str + eol
+        padded_colon = self.padded_colon_str
+        indent = self.indent
 
-        buffer = ["{", self.eol_str]
-        first_item = True
-        for prop in item.children:
-            if not first_item:
-                buffer += [self.padded_comma_str, self.eol_str]
-            self.indent(buffer, prop.depth).append(prop.name)
+        buffer = ["{", eol]
+        for child_index, prop in enumerate(item.children):
+            if child_index:
+                buffer.append(separator)
+            indent(buffer, prop.depth).append(prop.name)
 
-            if self.align_expanded_property_names or force_expand_prop_names:
-                buffer += " " * (max_prop_name_length - prop.name_length)
+            if align_names:
+                buffer.append(" " * (max_prop_name_length - prop.name_length))
 
-            buffer += [self.padded_colon_str, prop.value]
-            first_item = False
+            buffer += [padded_colon, prop.value if prop.fragments is None else prop]
 
-        buffer += self.eol_str
-        self.indent(buffer, item.depth).append("}")
+        buffer.append(eol)
+        indent(buffer, item.depth).append("}")
 
-        item.value = self.combine(buffer)
+        item.fragments = buffer
         item.format = Format.EXPANDED
         return True
 
@@ -1018,13 +1080,14 @@ class Formatter:
         if len(item_list) < 2 or self.dont_justify_numbers:  # noqa: PLR2004
             return
 
+        numeric_kinds = (JsonValueKind.INT, JsonValueKind.FLOAT)
+        if any(prop_node.kind not in numeric_kinds for prop_node in item_list):
+            return
+
         column_stats = ColumnStats(self.dont_justify_numbers)
         for prop_node in item_list:
             column_stats.update(prop_node, 0)
 
-        if column_stats.kind not in (JsonValueKind.INT, JsonValueKind.FLOAT):
-            return
-
         for prop_node in item_list:
             prop_node.value = column_stats.format_value(
                 prop_node.value,
@@ -1048,7 +1111,7 @@ class Formatter:
         # order, and find the longest.
         props = {}
         for child in item.children:
-            if child.kind != JsonValueKind.DICT or child.format != Format.INLINE:
+            if child.kind != JsonValueKind.DICT or child.format is not _INLINE:
                 return None
 
             for index, prop_node in enumerate(child.children):
@@ -1065,7 +1128,7 @@ class Formatter:
         # Decide the order of the properties by sorting by the average index. It's a crude metric,
         # but it should handle the occasional missing property well enough.
         ordered_props = sorted(props.values(), key=lambda x: x.order_sum / x.count)
-        total_prop_count = sum([cs.count for cs in ordered_props])
+        total_prop_count = sum(cs.count for cs in ordered_props)
 
         # Calculate a score based on how many of all possible properties are present.
         # If the score is too low, these dicts are too different to try to line
@@ -1081,11 +1144,11 @@ class Formatter:
         # Outer brackets & spaces
         line_length = 4
         # Property names
-        line_length += sum([cs.prop_name_length for cs in ordered_props])
+        line_length += sum(cs.prop_name_length for cs in ordered_props)
         # Colons
         line_length += len(self.padded_colon_str) * len(ordered_props)
         # Values
-        line_length += sum([cs.max_value_size for cs in ordered_props])
+        line_length += sum(cs.max_value_size for cs in ordered_props)
         # Commas
         line_length += len(self.padded_comma_str) * (len(ordered_props) - 1)
         if line_length > self.max_inline_length:
@@ -1103,15 +1166,15 @@ class Formatter:
             return None
 
         valid = all(
-            fn.kind == JsonValueKind.LIST and fn.format == Format.INLINE
+            fn.kind == JsonValueKind.LIST and fn.format is _INLINE
             for fn in item.children
         )
         if not valid:
             return None
 
-        number_of_columns = max([len(fn.children) for fn in item.children])
+        number_of_columns = max(len(fn.children) for fn in item.children)
         col_stats_list = [
-            ColumnStats(self.dont_justify_numbers) for x in range(number_of_columns)
+            ColumnStats(self.dont_justify_numbers) for _ in range(number_of_columns)
         ]
 
         for row_node in item.children:
@@ -1120,7 +1183,7 @@ class Formatter:
 
         # Calculate a score based on how rectangular the lists are. If they differ
         # too much in length, it probably doesn't make sense to format them together.
-        total_elem_count = sum([len(fn.children) for fn in item.children])
+        total_elem_count = sum(len(fn.children) for fn in item.children)
         try:
             similarity = (
                 100 * total_elem_count / (len(item.children) * number_of_columns)
@@ -1132,7 +1195,7 @@ class Formatter:
 
         # If the formatted lines would be too long, bail out.
         line_length = 4
-        line_length += sum([cs.max_value_size for cs in col_stats_list])
+        line_length += sum(cs.max_value_size for cs in col_stats_list)
         line_length += (len(col_stats_list) - 1) * len(self.padded_comma_str)
         if line_length > self.max_inline_length:
             return None
@@ -1,4 +1,48 @@
+import json
+from pathlib import Path
+
+import pytest
+
+# Only holds JSON fixtures, so there is nothing for pytest to collect there
+collect_ignore = ["data"]
+
+
 def pytest_addoption(parser):
     parser.addoption("--test-file", action="store", default=None)
+    parser.addoption(
+        "--json-test-glob",
+        action="store",
+        default=None,
+        help="only run test_json for source files in tests/data matching this glob",
+    )
     parser.addoption("--test-verbose", action="store_true", default=False)
     parser.addoption("--test-debug", action="store_true", default=False)
+    parser.addoption(
+        "--fast",
+        action="store_true",
+        default=False,
+        help="skip tests marked slow, such as those that start a new interpreter",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if not config.getoption("fast"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow test skipped by --fast")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture(scope="session")
+def loaded_json():
+    """Return a function loading a JSON file, parsing each path once per session."""
+    cache = {}
+
+    def load(path: Path) -> object:
+        path = Path(path)
+        if path not in cache:
+            cache[path] = json.loads(path.read_bytes())
+        return cache[path]
+
+    return load
@@ -1,7 +1,14 @@
+import logging
+import warnings
 from collections import OrderedDict
+from enum import Enum, IntEnum
 
 import pytest
 from compact_json import Formatter
+from compact_json.formatter import FormattedNode, _dumps_cached
+
+# Report every RuntimeWarning so that counts of recorded warnings are exact
+pytestmark = pytest.mark.filterwarnings("always::RuntimeWarning")
 
 REF_ISSUE_7 = '{ "100": "mary", "200": "had", "300": ["a", "little", "lamb"] }'
 REF_TYPES = """{
@@ -26,21 +33,27 @@ REF_ISSUE_27 = """{
 """  # noqa: W291
 
 
-@pytest.mark.filterwarnings("ignore:coercing key")
-def test_issue_7():
-    with pytest.warns(RuntimeWarning) as record:
-        obj = {100: "mary", 200: "had", 300: ["a", "little", "lamb"]}
-        formatter = Formatter(indent_spaces=2, max_inline_length=100)
-        json_string = formatter.serialize(obj)
+@pytest.fixture(scope="module")
+def issue7_obj():
+    return {100: "mary", 200: "had", 300: ["a", "little", "lamb"]}
+
+
+@pytest.fixture(scope="module")
+def formatter_small():
+    return Formatter(indent_spaces=2, max_inline_length=100)
+
+
+def test_issue_7(issue7_obj, formatter_small):
+    with warnings.catch_warnings(record=True) as record:
+        json_string = formatter_small.serialize(issue7_obj)
         assert len(record) == 3
         assert json_string == REF_ISSUE_7
 
 
-def test_issue_7_part2():
-    with pytest.warns(RuntimeWarning) as record:
-        obj = {100: "replace", 200: "had", 300: ["a", "little", "lamb"], "100": "mary"}
-        formatter = Formatter(indent_spaces=2, max_inline_length=100)
-        json_string = formatter.serialize(obj)
+def test_issue_7_part2(issue7_obj, formatter_small):
+    with warnings.catch_warnings(record=True) as record:
+        obj = {**issue7_obj, 100: "replace", "100": "mary"}
+        json_string = formatter_small.serialize(obj)
         assert json_string == REF_ISSUE_7
         assert len(record) == 4
         assert "converting key value 100 to string" in record[0].message.args[0]
@@ -91,8 +104,142 @@ def test_issue_27():
     result = formatter.serialize({MyEnum.abc: "abc", MyEnum.xyz: "xyz"})
     assert result == '{"Abc": "abc", "XYZ": "xyz"}'
 
-    with pytest.warns(RuntimeWarning) as record:
+    with warnings.catch_warnings(record=True) as record:
         result = formatter.serialize({MyEnum2.abc: "abc", MyEnum2.xyz: "xyz"})
         assert result == '{"1": "abc", "2": "xyz"}'
         assert len(record) == 2
         assert str(record[0].message) == "converting key value 1 to string"
+
+
+REF_LIST_TABLE_COLUMNS = """[
+    [  1, "a"   , 100.50 ], 
+    [ 22, "bbbb",   3.25 ]
+]"""  # noqa: W291
+
+
+def test_list_table_columns():
+    # Each column must keep its own stats rather than sharing one ColumnStats
+    formatter = Formatter(max_inline_length=30)
+    json_string = formatter.serialize([[1, "a", 100.5], [22, "bbbb", 3.25]])
+    assert json_string == REF_LIST_TABLE_COLUMNS
+
+
+def test_fast_dumps_fallback():
+    formatter = Formatter()
+    obj = ["\x7f", "\ud800", 2**64, "é"]
+    assert formatter.serialize(obj) == '["\\u007f", "\\ud800", 18446744073709551616, "\\u00e9"]'
+    formatter.ensure_ascii = False
+    assert formatter.serialize(obj) == '["\x7f", "\ud800", 18446744073709551616, "é"]'
+
+
+def test_long_strings_not_cached():
+    _dumps_cached.cache_clear()
+    formatter = Formatter()
+    long_value = "x" * 100
+    assert formatter.serialize({"key": long_value}) == f'{{\n    "key": "{long_value}"\n}}'
+    assert _dumps_cached.cache_info().currsize == 1
+
+
+def test_indent_settings_change():
+    formatter = Formatter(max_inline_length=20)
+    obj = {"key": [1, 2, 3, 4, 5]}
+    assert formatter.serialize(obj) == '{\n    "key": [1, 2, 3, 4, 5]\n}'
+    formatter.indent_spaces = 2
+    formatter.prefix_string = "//"
+    assert formatter.serialize(obj) == '//{\n//  "key": [1, 2, 3, 4, 5]\n//}'
+
+
+REF_LEADING_NULL = """[
+    null, 1, 22, 
+    333, 4444
+]"""  # noqa: W291
+
+REF_LEADING_NULL_TABLE = """[
+    { "a": null , "b":  1 }, 
+    { "a": 1.5  , "b": 22 }, 
+    { "a": 22.25, "b":  3 }
+]"""  # noqa: W291
+
+
+def test_leading_null_not_justified():
+    formatter = Formatter(max_inline_length=12)
+    with warnings.catch_warnings(record=True) as w:
+        json_string = formatter.serialize([None, 1, 22, 333, 4444])
+    assert len(w) == 0
+    assert json_string == REF_LEADING_NULL
+
+
+def test_leading_null_table_column_not_justified():
+    formatter = Formatter(max_inline_length=30)
+    obj = [{"a": None, "b": 1}, {"a": 1.5, "b": 22}, {"a": 22.25, "b": 3}]
+    with warnings.catch_warnings(record=True) as w:
+        json_string = formatter.serialize(obj)
+    assert len(w) == 0
+    assert json_string == REF_LEADING_NULL_TABLE
+
+
+def test_non_finite_floats_justified():
+    formatter = Formatter(max_inline_length=10)
+    obj = [float("nan"), 1.5, 2.25, float("-inf")]
+    with warnings.catch_warnings(record=True) as w:
+        json_string = formatter.serialize(obj)
+    assert len(w) == 0
+    assert json_string == (
+        "[\n             NaN, \n            1.50, \n            2.25, \n       -Infinity\n]"
+    )
+
+
+def test_justified_negative_zero_and_long_ints():
+    # Decimal.quantize wrote -0.0 as -0E-14 and could not quantize ints over 28 digits
+    formatter = Formatter(max_inline_length=20)
+    assert formatter.serialize([-83.61524402240025, -0.0]) == (
+        "[\n    -83.61524402240025, \n     -0.00000000000000\n]"
+    )
+    formatter = Formatter(max_inline_length=40)
+    with warnings.catch_warnings(record=True) as w:
+        json_string = formatter.serialize([1.5, 10**30, 2])
+    assert len(w) == 0
+    assert json_string == (
+        "[\n                                  1.5, \n"
+        "    1000000000000000000000000000000.0, \n"
+        "                                  2.0\n]"
+    )
+
+
+def test_subclassed_values():
+    class MyList(list):
+        pass
+
+    class MyIntEnum(IntEnum):
+        abc = 10
+
+    class MyStrEnum(str, Enum):
+        xyz = "XYZ"
+
+    class MyFloat(float):
+        pass
+
+    formatter = Formatter(max_inline_length=10)
+    obj = MyList([MyIntEnum.abc, MyFloat(1.5), 200])
+    assert formatter.serialize(obj) == "[\n     10.0, \n      1.5, \n    200.0\n]"
+    assert formatter.serialize([MyStrEnum.xyz, "a"]) == '[\n    "XYZ", "a"\n]'
+
+
+def test_formatter_subclass_overrides():
+    calls = []
+
+    class RecordingFormatter(Formatter):
+        def format_list(self, depth, element) -> FormattedNode:
+            calls.append(element)
+            return super().format_list(depth, element)
+
+    assert RecordingFormatter().serialize({"a": [1, 2]}) == '{ "a": [1, 2] }'
+    assert calls == [[1, 2]]
+
+
+def test_debug_buffer_shows_strings(caplog):
+    formatter = Formatter(max_inline_length=10, max_compact_list_complexity=3)
+    with caplog.at_level(logging.DEBUG, logger="compact_json.formatter"):
+        formatter.serialize([[[1, 2], [3, 4, 5, 6, 7, 8]], 1111, 2222, 3333, 4444])
+    assert "buffer=" in caplog.text
+    assert "FormattedNode object" not in caplog.text
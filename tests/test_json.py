@@ -1,6 +1,18 @@
-import json
+"""Compare Formatter output against the reference files in tests/data.
+
+Each source file test-N.json is formatted with the @param=value settings at the top of
+each matching test-N.ref* file and compared to the rest of that file. To run a subset:
+
+    pytest tests/test_json.py --test-file tests/data/test-12.ref-1.json
+    pytest tests/test_json.py --json-test-glob "test-12*"
+"""
+
+import ast
 import logging
 import re
+from collections import defaultdict
+from dataclasses import astuple
+from functools import cache
 from pathlib import Path
 
 import compact_json
@@ -9,72 +21,104 @@ from compact_json import Formatter
 logger = logging.getLogger(compact_json.__name__)
 
 
-test_data_path = Path("tests/data")
+test_data_path = Path(__file__).parent / "data"
+# Walk the data directory once at import rather than per collection
+_data_filenames = tuple(sorted(test_data_path.rglob("*")))
+
+_REF_SUFFIX_RE = re.compile(r"[.]ref.*")
+
+# One Formatter per distinct set of directives; serialize() resets its internals on each call
+_formatters = {}
+# Serialized output keyed by source file and Formatter settings, shared by all refs
+_serialized = {}
+
+
+def _collect_cases(config) -> list[tuple[Path, Path]]:
+    """Return (source, ref) filename pairs, limited to --test-file if it is given."""
+    if config.getoption("test_file") is not None:
+        ref_filename = Path(config.getoption("test_file"))
+        return [(Path(_REF_SUFFIX_RE.sub(".json", str(ref_filename))), ref_filename)]
+
+    # Bucket ref files by their source's stem
+    source_glob = config.getoption("json_test_glob")
+    source_filenames = []
+    ref_filenames = defaultdict(list)
+    for filename in _data_filenames:
+        if ".ref" in filename.name:
+            ref_filenames[filename.name.split(".ref")[0]].append(filename)
+        elif filename.suffix == ".json" and (source_glob is None or filename.match(source_glob)):
+            source_filenames.append(filename)
+
+    return [
+        (source_filename, ref_filename)
+        for source_filename in source_filenames
+        for ref_filename in ref_filenames[source_filename.stem]
+    ]
+
+
+def _parse_directive_value(param: str, value: str) -> object:
+    """Evaluate a directive value as a Python literal or a compact_json enum such as EolStyle.LF."""
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        (enum_name, _, member) = value.rpartition(".")
+        enum = getattr(compact_json, enum_name, None) if enum_name else None
+        if enum is None or member not in getattr(enum, "__members__", {}):
+            msg = f"invalid value for directive @{param}: {value}"
+            raise ValueError(msg) from None
+        return enum[member]
+
+
+@cache
+def _read_ref(ref_filename: Path) -> tuple[tuple[tuple[str, object], ...], str]:
+    """Parse a ref file into its @param=value directives and reference JSON."""
+    directives = []
+    ref_lines = []
+    for line in ref_filename.read_bytes().decode("utf-8").splitlines(keepends=True):
+        if line.startswith("@"):
+            (param, _, value) = line[1:].partition("=")
+            param = param.strip()
+            directives.append((param, _parse_directive_value(param, value.strip())))
+        else:
+            ref_lines.append(line)
+    # No final newline
+    return (tuple(directives), "".join(ref_lines).rstrip())
 
 
-def test_json(pytestconfig):  # noqa: PLR0912, C901
-    if pytestconfig.getoption("test_verbose"):
-        print("\n")
+def pytest_generate_tests(metafunc):
+    if "ref_filename" in metafunc.fixturenames:
+        cases = _collect_cases(metafunc.config)
+        metafunc.parametrize(
+            ("source_filename", "ref_filename"),
+            cases,
+            ids=[ref_filename.name for _, ref_filename in cases],
+        )
 
+
+def test_json(pytestconfig, loaded_json, source_filename, ref_filename):
     if pytestconfig.getoption("test_debug"):
         logger.setLevel("DEBUG")
 
-    if pytestconfig.getoption("test_file") is not None:
-        ref_filename = pytestconfig.getoption("test_file")
-        source_filenames = [Path(re.sub(r"[.]ref.*", ".json", ref_filename))]
-    else:
-        source_filenames = sorted(test_data_path.rglob("*.json"))
+    if pytestconfig.getoption("test_verbose"):
+        print(f"\n*** Testing {ref_filename} with source file {source_filename}")
+
+    obj = loaded_json(source_filename)
+    (directives, ref_json) = _read_ref(ref_filename)
+    if directives not in _formatters:
+        _formatters[directives] = Formatter(**dict(directives))
+    formatter = _formatters[directives]
 
-    for source_filename in source_filenames:
-        if source_filename.match("*.ref*"):
-            continue
+    key = (source_filename, astuple(formatter))
+    if key not in _serialized:
+        _serialized[key] = formatter.serialize(obj)
+    json_string = _serialized[key]
 
-        if pytestconfig.getoption("test_verbose"):
-            print(f"*** Overriding source file: {source_filename}")
+    assert json_string == ref_json
 
-        with open(source_filename) as f:
-            obj = json.load(f)
 
-        if pytestconfig.getoption("test_file") is not None:
-            ref_filenames = [pytestconfig.getoption("test_file")]
-        else:
-            ref_filenames = test_data_path.rglob(source_filename.stem + ".ref*")
-
-        for ref_filename in ref_filenames:
-            if pytestconfig.getoption("test_verbose"):
-                print(f"*** Testing {ref_filename}")
-            formatter = Formatter()
-            with open(ref_filename) as f:
-                ref_json = ""
-                for line in f.readlines():
-                    if line.startswith("@"):
-                        (param, value) = re.split(r"\s*=\s*", line[1:])
-                        value = value.strip()
-                        exec(f"formatter.{param} = {value}")  # noqa: S102
-                    else:
-                        ref_json += line
-            # No final newline
-            ref_json = ref_json.rstrip()
-
-            json_string = formatter.serialize(obj)
-
-            if pytestconfig.getoption("test_verbose") and json_string != ref_json:
-                json_string_dbg = ">" + re.sub(r"\n", "<\n>", json_string) + "<"
-                ref_json_dbg = ">" + re.sub(r"\n", "<\n>", ref_json) + "<"
-                print("===== TEST")
-                print(json_string_dbg)
-                print("===== REF")
-                print(ref_json_dbg)
-                print("=====")
-
-            assert json_string == ref_json
-
-
-def test_dump(tmp_path):
+def test_dump(tmp_path, loaded_json):
     tmp_file = tmp_path / "test.json"
-    source_filename = test_data_path / "test-bool.json"
-    with open(source_filename) as f:
-        obj = json.load(f)
+    obj = loaded_json(test_data_path / "test-bool.json")
     formatter = Formatter()
     formatter.dump(obj, output_file=tmp_file, newline_at_eof=False)
     assert tmp_file.read_text() == '{ "bools": {"true": true, "false": false} }'